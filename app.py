@@ -5,7 +5,8 @@ import io
 import os
 from pathlib import Path
 import sys
-from src.multimodal_rag import MultimodalRAGSystem, RAGConfig
+from src.multimodal_rag import MultimodalRAGSystem, RAGConfig, LLMScheduler, LLMRequestError, CollectionStore
+from src.multimodal_rag.collection_store import CollectionBusyError, validate_collection_name
 
 # Add the src directory to Python path
 sys.path.append(str(Path(__file__).parent))
@@ -18,6 +19,16 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource
+def get_llm_scheduler(api_key: str) -> LLMScheduler:
+    """One pooled client and scheduler per API key, shared by all sessions and reruns"""
+    return LLMScheduler(RAGConfig(api_key=api_key))
+
+@st.cache_resource
+def get_collection_store() -> CollectionStore:
+    """One collection store (and embedding model) shared by all sessions and reruns"""
+    return CollectionStore(RAGConfig())
+
 def main():
     # Initialize session state
     if 'rag_system' not in st.session_state:
@@ -37,11 +48,16 @@ def main():
         
         # API Key
         api_key = st.text_input("OpenAI API Key", type="password")
-        if api_key:
+        if api_key and st.session_state.get('api_key') != api_key:
             os.environ["OPENAI_API_KEY"] = api_key
             try:
                 config = RAGConfig(api_key=api_key)
-                st.session_state.rag_system = MultimodalRAGSystem(config)
+                st.session_state.rag_system = MultimodalRAGSystem(
+                    config,
+                    scheduler=get_llm_scheduler(api_key),
+                    collections=get_collection_store()
+                )
+                st.session_state.api_key = api_key
                 st.success("System initialized!")
             except Exception as e:
                 st.error(f"Initialization failed: {e}")
@@ -50,6 +66,15 @@ def main():
             st.warning("Please enter your OpenAI API key to continue")
             st.stop()
         
+        # Collection selection
+        collection = st.text_input("Collection (leave empty for default)").strip() or None
+        if collection is not None:
+            try:
+                validate_collection_name(collection)
+            except ValueError as e:
+                st.error(str(e))
+                st.stop()
+        
         # File upload
         st.header("📁 Upload PDFs")
         uploaded_files = st.file_uploader(
@@ -61,7 +86,7 @@ def main():
         if st.button("Process Documents") and uploaded_files:
             for file in uploaded_files:
                 content = file.read()
-                stats = st.session_state.rag_system.process_pdf(content, file.name)
+                stats = st.session_state.rag_system.process_pdf(content, file.name, collection=collection)
                 st.session_state.processing_stats[file.name] = stats
                 st.success(f"Processed {file.name}: {stats['text_chunks']} text chunks, {stats['images']} images")
         
@@ -69,10 +94,13 @@ def main():
         
         # System management
         if st.button("Clear All Data"):
-            st.session_state.rag_system.clear_data()
-            st.session_state.processing_stats = {}
-            st.session_state.image_store = {}
-            st.success("All data cleared!")
+            try:
+                st.session_state.rag_system.clear_data(collection=collection)
+                st.session_state.processing_stats = {}
+                st.session_state.image_store = {}
+                st.success("All data cleared!")
+            except CollectionBusyError as e:
+                st.error(str(e))
     
     # Main content
     if st.session_state.rag_system:
@@ -91,7 +119,7 @@ def main():
         if st.button("Submit"):
             with st.spinner("Processing..."):
                 try:
-                    result = st.session_state.rag_system.query(query)
+                    result = st.session_state.rag_system.query(query, collection=collection)
                     
                     # Display answer
                     st.subheader("🤖 Answer")
@@ -115,6 +143,8 @@ def main():
                                 img = Image.open(io.BytesIO(img_bytes))
                                 with cols[i % len(cols)]:
                                     st.image(img, caption=f"Image {i+1}", use_column_width=True)
+                except LLMRequestError as e:
+                    st.error(f"The language model is busy or unavailable, please try again shortly: {e}")
                 except Exception as e:
                     st.error(f"Error processing query: {e}")
 
@@ -0,0 +1,54 @@
+"""Compare embedding throughput (chunks/sec) across backends.
+
+Usage:
+    python benchmarks/bench_embedders.py [--onnx-model-path DIR] [--threads N]
+"""
+import argparse
+import random
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.multimodal_rag.config import RAGConfig
+from src.multimodal_rag.embedders import create_embedder, benchmark_embedder
+
+WORDS = "the model retrieves relevant document chunks and images to answer user questions".split()
+
+def make_chunks(n: int, seed: int = 0):
+    """Generate synthetic chunks with a realistic spread of lengths"""
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 400))) for _ in range(n)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--onnx-model-path", default=None)
+    args = parser.parse_args()
+
+    backends = ["hashing", "sentence-transformers"]
+    if args.onnx_model_path:
+        backends.append("onnx")
+
+    texts = make_chunks(args.chunks)
+    print(f"{'backend':<30}{'chunks/sec':>12}{'seconds':>10}")
+    for backend in backends:
+        config = RAGConfig(
+            embedding_backend=backend,
+            onnx_model_path=args.onnx_model_path,
+            embedding_batch_size=args.batch_size,
+            embedding_threads=args.threads,
+        )
+        try:
+            embedder = create_embedder(config)
+        except (ImportError, OSError, ValueError) as e:
+            # Missing optional packages or models that cannot be loaded/downloaded
+            print(f"{backend:<30}skipped ({e})")
+            continue
+        result = benchmark_embedder(embedder, texts)
+        print(f"{result['backend']:<30}{result['chunks_per_sec']:>12.1f}{result['seconds']:>10.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,4 @@
 from .rag_system import MultimodalRAGSystem
-from .config import RAGConfig
\ No newline at end of file
+from .config import RAGConfig
+from .llm_scheduler import LLMScheduler, LLMRequestError
+from .collection_store import CollectionStore
\ No newline at end of file
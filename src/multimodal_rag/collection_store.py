@@ -0,0 +1,251 @@
+import os
+import re
+import pickle
+import shutil
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import List, Dict, Any
+from .embedders import Embedder, create_embedder
+from .vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,127}$")
+
+# Approximate per-item bookkeeping overhead (dicts, metadata) in bytes
+ITEM_OVERHEAD_BYTES = 256
+
+class CollectionBusyError(RuntimeError):
+    """Raised when a collection cannot be deleted because it is being written"""
+
+def validate_collection_name(name: str):
+    """Raise ValueError unless `name` is safe to use as a collection directory name"""
+    if not COLLECTION_NAME_PATTERN.match(name):
+        raise ValueError(
+            f"Invalid collection name: {name!r} (use letters, digits, '-', '_' or '.', "
+            "starting with a letter or digit)"
+        )
+
+class Collection:
+    """A named corpus: a vector store plus its image store, persisted in one directory"""
+
+    VECTOR_STORE_FILE = "vector_store.pkl"
+    IMAGE_STORE_FILE = "images.pkl"
+
+    def __init__(self, name: str, path: str, config, embedder: Embedder):
+        self.name = name
+        self.path = path
+        self.vector_store = VectorStore(config, embedder)
+        self.image_store = {}
+        self.dirty = False
+        # Readers and writers hold the lock (faiss search must not run during add);
+        # pinned collections are never evicted
+        self.lock = threading.RLock()
+        self.pins = 0
+        # Set once deleted, so stale references can never write the data back
+        self.deleted = False
+        self.size_bytes = 0
+
+    def load(self):
+        """Load the collection from disk if it has been saved before.
+
+        Raises if the stored vector store cannot be read, so that a damaged
+        collection is never opened empty and then overwritten.
+        """
+        vector_store_path = os.path.join(self.path, self.VECTOR_STORE_FILE)
+        if os.path.exists(vector_store_path):
+            self.vector_store.load(vector_store_path, strict=True)
+        image_store_path = os.path.join(self.path, self.IMAGE_STORE_FILE)
+        if os.path.exists(image_store_path):
+            with open(image_store_path, 'rb') as f:
+                self.image_store = pickle.load(f)
+        self.dirty = False
+
+    def save(self):
+        """Persist the collection to its directory, replacing each file atomically"""
+        if self.deleted:
+            raise RuntimeError(f"Collection {self.name} has been deleted")
+        os.makedirs(self.path, exist_ok=True)
+
+        # Images first: new images next to an old vector store are harmless,
+        # whereas text referencing missing images is not
+        def write_images(tmp_path):
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(self.image_store, f)
+        self._atomic_write(self.IMAGE_STORE_FILE, write_images)
+        self._atomic_write(self.VECTOR_STORE_FILE, self.vector_store.save)
+        self.dirty = False
+
+    def _atomic_write(self, filename: str, write):
+        """Call `write(tmp_path)` and move the result over `filename` in one step"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, prefix=f".{filename}.", suffix=".tmp")
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, os.path.join(self.path, filename))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def memory_bytes(self) -> int:
+        """Estimate the in-memory footprint of the index, text items and images"""
+        total = 0
+        index = self.vector_store.index
+        if index is not None:
+            total += index.ntotal * index.d * 4
+        for item in self.vector_store.items:
+            total += len(item["content"]) + ITEM_OVERHEAD_BYTES
+        for img in self.image_store.values():
+            total += len(img["content"]) + ITEM_OVERHEAD_BYTES
+        return total
+
+class CollectionStore:
+    """Named collections under a root directory sharing a single embedder.
+
+    Collections are opened lazily and kept in an LRU cache. When the total
+    estimated memory exceeds the configured budget, the least recently used
+    collections are dropped from memory (every write is saved immediately).
+    One store is meant to be shared process-wide; access goes through
+    `open_for_read` / `open_for_write`, which serialize readers against
+    writers on the same collection.
+
+    Lock order: a collection's lock is never held while waiting for the
+    store lock, so `delete` may wait on a collection lock under the store lock.
+    """
+
+    def __init__(self, config, embedder: Embedder = None):
+        self.config = config
+        self.root = config.collections_root
+        self.memory_budget = config.collection_memory_budget_mb * 1024 * 1024
+        self.embedder = embedder or create_embedder(config)
+        self._open = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.RLock()
+
+    def get(self, name: str) -> Collection:
+        """Return a collection, opening it from disk (or creating it) if needed"""
+        with self._lock:
+            if name in self._open:
+                self._open.move_to_end(name)
+                return self._open[name]
+
+            collection = Collection(name, self._path(name), self.config, self.embedder)
+            collection.load()
+            collection.size_bytes = collection.memory_bytes()
+            self._open[name] = collection
+            self._memory_bytes += collection.size_bytes
+            logger.info(f"Opened collection {name}")
+            self._evict()
+            return collection
+
+    @contextmanager
+    def open_for_read(self, name: str):
+        """Open a collection for reading; writers are excluded until the block exits"""
+        while True:
+            collection = self.get(name)
+            with collection.lock:
+                # Deleted between get() and acquiring the lock: open the new one
+                if collection.deleted:
+                    continue
+                yield collection
+                return
+
+    @contextmanager
+    def open_for_write(self, name: str):
+        """Open a collection for writing and save it when the block exits.
+
+        The collection is locked against readers and other writers and pinned
+        in memory so it cannot be evicted (and reopened stale from disk)
+        mid-write. If the block or the save fails, the in-memory copy is
+        discarded so the next access reloads the last saved state.
+        """
+        with self._lock:
+            collection = self.get(name)
+            collection.pins += 1
+        failed = True
+        size_bytes = collection.size_bytes
+        try:
+            with collection.lock:
+                try:
+                    yield collection
+                    collection.dirty = True
+                    collection.save()
+                    failed = False
+                finally:
+                    size_bytes = collection.memory_bytes()
+        finally:
+            with self._lock:
+                collection.pins -= 1
+                if self._open.get(name) is collection:
+                    self._memory_bytes += size_bytes - collection.size_bytes
+                    collection.size_bytes = size_bytes
+                    if failed and not collection.pins:
+                        self._drop(name)
+                self._evict()
+
+    def list_collections(self) -> List[str]:
+        """List collections that exist on disk or are currently open"""
+        with self._lock:
+            names = set(self._open)
+            if os.path.isdir(self.root):
+                names.update(
+                    entry for entry in os.listdir(self.root)
+                    if os.path.isdir(os.path.join(self.root, entry))
+                )
+        return sorted(names)
+
+    def delete(self, name: str):
+        """Remove a collection from memory and disk.
+
+        Raises CollectionBusyError while the collection is being written;
+        waits for in-progress reads to finish.
+        """
+        with self._lock:
+            path = self._path(name)
+            collection = self._open.get(name)
+            if collection is not None:
+                if collection.pins:
+                    raise CollectionBusyError(f"Collection {name} is being written, try again later")
+                with collection.lock:
+                    collection.deleted = True
+                    self._drop(name)
+            if os.path.exists(path):
+                shutil.rmtree(path)
+            logger.info(f"Deleted collection {name}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Report open collections and their estimated memory usage"""
+        with self._lock:
+            usage = {name: c.size_bytes for name, c in self._open.items()}
+            total = self._memory_bytes
+        return {
+            "open": list(usage),
+            "memory_bytes": total,
+            "memory_budget_bytes": self.memory_budget,
+            "per_collection": usage
+        }
+
+    def _drop(self, name: str):
+        """Forget an open collection (caller holds the store lock)"""
+        collection = self._open.pop(name)
+        self._memory_bytes -= collection.size_bytes
+
+    def _evict(self):
+        """Evict least recently used unpinned collections until within the memory budget"""
+        # Always keep the most recently used collection, even if it alone exceeds the budget
+        for name in list(self._open)[:-1]:
+            if self._memory_bytes <= self.memory_budget:
+                break
+            if self._open[name].pins:
+                continue
+            size_bytes = self._open[name].size_bytes
+            self._drop(name)
+            logger.info(f"Evicted collection {name} ({size_bytes} bytes)")
+
+    def _path(self, name: str) -> str:
+        validate_collection_name(name)
+        return os.path.join(self.root, name)
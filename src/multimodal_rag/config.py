@@ -12,6 +12,24 @@ class RAGConfig:
     max_image_size: tuple = (512, 512)
     enable_image_processing: bool = True
     vector_store_path: str = "vector_store.pkl"
+    collections_root: str = "collections"
+    collection_memory_budget_mb: int = 1024
+    embedding_backend: str = "sentence-transformers"  # "sentence-transformers", "onnx" or "hashing"
+    embedding_model: str = "all-MiniLM-L6-v2"
+    onnx_model_path: str = None
+    onnx_allow_fp32: bool = False
+    embedding_batch_size: int = 32
+    embedding_max_batch_tokens: int = 8192
+    embedding_threads: int = None
+    llm_base_url: str = None
+    llm_timeout: float = 60.0
+    llm_max_retries: int = 5
+    llm_base_backoff: float = 0.5
+    llm_max_backoff: float = 30.0
+    llm_max_concurrency: int = 4
+    llm_max_connections: int = 10
+    llm_requests_per_minute: int = 500
+    llm_tokens_per_minute: int = 30000
     
     def __post_init__(self):
         if self.api_key is None:
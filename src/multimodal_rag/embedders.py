@@ -0,0 +1,221 @@
+import os
+import time
+import hashlib
+import logging
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+class Embedder(ABC):
+    """Base class for text embedding backends"""
+
+    def __init__(self, batch_size: int = 32, max_batch_tokens: int = 8192, num_threads: int = None):
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.num_threads = num_threads
+
+    @property
+    @abstractmethod
+    def dimension(self) -> int:
+        """Size of the embedding vectors"""
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into L2-normalized float32 vectors, preserving input order"""
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for batch in self._make_batches(texts):
+            batch_embeddings = self._encode_batch([texts[i] for i in batch])
+            embeddings[batch] = batch_embeddings
+
+        # Normalize so inner product / L2 distance behave like cosine similarity
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return embeddings / norms
+
+    def _make_batches(self, texts: List[str]) -> List[List[int]]:
+        """Group text indices into length-sorted batches bounded by a token budget"""
+        order = sorted(range(len(texts)), key=lambda i: self._estimate_tokens(texts[i]))
+
+        batches = []
+        current = []
+        for i in order:
+            # Texts are sorted, so the current one is the longest in the batch
+            # and padding cost is len(batch) * its length
+            padded_tokens = (len(current) + 1) * self._estimate_tokens(texts[i])
+            if current and (len(current) >= self.batch_size or padded_tokens > self.max_batch_tokens):
+                batches.append(current)
+                current = []
+            current.append(i)
+        if current:
+            batches.append(current)
+
+        return batches
+
+    def _estimate_tokens(self, text: str) -> int:
+        """Cheap token count estimate used for batching (~4 characters per token)"""
+        return max(1, len(text) // 4)
+
+    @abstractmethod
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed one batch of texts (without normalization)"""
+
+class SentenceTransformerEmbedder(Embedder):
+    """Embedding backend using sentence-transformers"""
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", **kwargs):
+        super().__init__(**kwargs)
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+        self.model = SentenceTransformer(model_name)
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def _estimate_tokens(self, text: str) -> int:
+        # Inputs are truncated to the model's maximum sequence length
+        return min(super()._estimate_tokens(text), self.model.max_seq_length)
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, batch_size=len(texts), convert_to_numpy=True)
+
+class ONNXEmbedder(Embedder):
+    """Embedding backend using ONNX Runtime with a locally exported model.
+
+    The model directory must contain a ``tokenizer.json`` and an int8
+    quantized ``model_quantized.onnx``; an fp32 ``model.onnx`` is only used
+    when ``allow_fp32`` is set. If the
+    model has a pooled ``sentence_embedding`` output it is used directly;
+    otherwise the first output is treated as token embeddings and mean-pooled.
+    """
+
+    QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+    FP32_MODEL_FILE = "model.onnx"
+
+    def __init__(self, model_path: str, max_length: int = 256, allow_fp32: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_file = os.path.join(model_path, self.QUANTIZED_MODEL_FILE)
+        if not os.path.exists(model_file):
+            fp32_file = os.path.join(model_path, self.FP32_MODEL_FILE)
+            if not allow_fp32 or not os.path.exists(fp32_file):
+                raise FileNotFoundError(
+                    f"No {self.QUANTIZED_MODEL_FILE} found in {model_path} "
+                    f"(set allow_fp32 to fall back to {self.FP32_MODEL_FILE})"
+                )
+            logger.warning(f"No int8 quantized model in {model_path}, falling back to fp32 {fp32_file}")
+            model_file = fp32_file
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_file, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        output_names = [o.name for o in self.session.get_outputs()]
+        self.output_name = "sentence_embedding" if "sentence_embedding" in output_names else output_names[0]
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_path, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        self.max_length = max_length
+
+        self._dimension = self._encode_batch(["dimension probe"]).shape[1]
+        logger.info(f"Loaded ONNX embedder from {model_file}")
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def _estimate_tokens(self, text: str) -> int:
+        return min(super()._estimate_tokens(text), self.max_length)
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "token_type_ids": np.zeros_like(input_ids),
+        }
+        # ONNX Runtime rejects inputs the exported graph does not declare
+        feeds = {name: value for name, value in feeds.items() if name in self.input_names}
+        outputs = self.session.run([self.output_name], feeds)[0]
+        if outputs.ndim == 2:
+            # Model already returns pooled sentence embeddings
+            return outputs.astype(np.float32)
+
+        # Mean pooling over non-padding tokens
+        mask = attention_mask[:, :, None].astype(np.float32)
+        summed = (outputs * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+        return (summed / counts).astype(np.float32)
+
+class HashingEmbedder(Embedder):
+    """Deterministic bag-of-words hashing embedder for tests (no model download)"""
+
+    def __init__(self, dimension: int = 384, **kwargs):
+        super().__init__(**kwargs)
+        self._dimension = dimension
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        embeddings = np.zeros((len(texts), self._dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                digest = hashlib.md5(token.encode()).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self._dimension
+                sign = 1.0 if digest[4] & 1 else -1.0
+                embeddings[row, bucket] += sign
+        return embeddings
+
+def create_embedder(config) -> Embedder:
+    """Create the embedding backend selected in the config"""
+    kwargs = {
+        "batch_size": config.embedding_batch_size,
+        "max_batch_tokens": config.embedding_max_batch_tokens,
+        "num_threads": config.embedding_threads,
+    }
+    backend = config.embedding_backend
+
+    if backend == "sentence-transformers":
+        return SentenceTransformerEmbedder(config.embedding_model, **kwargs)
+    if backend == "onnx":
+        if not config.onnx_model_path:
+            raise ValueError("onnx_model_path must be set for the onnx embedding backend")
+        return ONNXEmbedder(config.onnx_model_path, allow_fp32=config.onnx_allow_fp32, **kwargs)
+    if backend == "hashing":
+        return HashingEmbedder(**kwargs)
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+def benchmark_embedder(embedder: Embedder, texts: List[str], repeats: int = 3) -> Dict[str, Any]:
+    """Measure embedding throughput in chunks/sec (best of several runs)"""
+    embedder.encode(texts[:1])  # warm-up
+
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        embedder.encode(texts)
+        best = min(best, time.perf_counter() - start)
+
+    return {
+        "backend": type(embedder).__name__,
+        "chunks": len(texts),
+        "seconds": best,
+        "chunks_per_sec": len(texts) / best if best > 0 else float("inf"),
+    }
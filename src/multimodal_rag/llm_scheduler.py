@@ -0,0 +1,231 @@
+import time
+import heapq
+import random
+import logging
+import itertools
+import threading
+import weakref
+import httpx
+import openai
+from typing import List, Dict, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+# Request priorities (lower value is served first)
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Rough token cost charged for an image input when estimating usage
+IMAGE_TOKEN_ESTIMATE = 765
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+class LLMRequestError(Exception):
+    """Raised when an LLM request cannot be completed within its deadline or retry budget"""
+
+def create_client(config) -> openai.OpenAI:
+    """Create an OpenAI client backed by a pooled keep-alive HTTP connection"""
+    return openai.OpenAI(
+        api_key=config.api_key,
+        base_url=config.llm_base_url,
+        max_retries=0,  # retries are handled by LLMScheduler
+        timeout=config.llm_timeout,
+        http_client=openai.DefaultHttpxClient(
+            limits=httpx.Limits(
+                max_connections=config.llm_max_connections,
+                max_keepalive_connections=config.llm_max_connections
+            )
+        )
+    )
+
+class TokenBucket:
+    """Token bucket refilled continuously at `capacity` units per `period` seconds"""
+
+    def __init__(self, capacity: float, period: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if available now)"""
+        self._refill()
+        # Requests larger than the bucket are allowed once it is full
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        """Take `amount` units; the balance may go negative to account for overruns"""
+        self._refill()
+        self.tokens -= amount
+
+    def refund(self, amount: float):
+        """Return unused units to the bucket"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+class LLMScheduler:
+    """Shared, rate-limit-aware scheduler for OpenAI chat completion requests.
+
+    All requests go through one pooled client and are admitted in priority
+    order subject to a concurrency cap and requests/min and tokens/min limits.
+    Transient failures are retried with jittered exponential backoff,
+    honoring Retry-After, until the per-request deadline.
+    """
+
+    def __init__(self, config, client: openai.OpenAI = None):
+        self.config = config
+        self.owns_client = client is None
+        self.client = client or create_client(config)
+        # Close the pooled HTTP connections once the scheduler is discarded,
+        # but never a client the caller passed in and still owns
+        self._finalizer = weakref.finalize(self, self.client.close) if self.owns_client else None
+        self.request_bucket = TokenBucket(config.llm_requests_per_minute)
+        self.token_bucket = TokenBucket(config.llm_tokens_per_minute)
+
+        self._lock = threading.Condition()
+        self._waiting = []
+        self._counter = itertools.count()
+        self._active = 0
+        # After a 429, no request is admitted before this time
+        self._not_before = 0.0
+
+    def close(self):
+        """Close the underlying client and its HTTP connections, if this scheduler created it"""
+        if self._finalizer is not None:
+            self._finalizer()
+
+    def create(self, priority: int = INTERACTIVE, timeout: float = None, **kwargs) -> Any:
+        """Run a chat completion request, waiting for capacity and retrying transient errors"""
+        deadline = time.monotonic() + (timeout or self.config.llm_timeout)
+        estimate = self._estimate_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+
+        for attempt in range(self.config.llm_max_retries + 1):
+            self._acquire(priority, estimate, deadline)
+            try:
+                remaining = deadline - time.monotonic()
+                response = self.client.chat.completions.create(timeout=remaining, **kwargs)
+            except RETRYABLE_ERRORS as e:
+                self._release(estimate, used=None)
+                delay = self._backoff(attempt, e)
+                if isinstance(e, openai.RateLimitError):
+                    self._pause(delay)
+                if attempt == self.config.llm_max_retries:
+                    raise LLMRequestError(f"LLM request failed after {attempt + 1} attempts: {e}") from e
+                if time.monotonic() + delay >= deadline:
+                    raise LLMRequestError(f"LLM request deadline exceeded: {e}") from e
+                logger.warning(f"LLM request failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+            except Exception:
+                self._release(estimate, used=None)
+                raise
+            else:
+                usage = getattr(response, "usage", None)
+                used = getattr(usage, "total_tokens", None)
+                self._release(estimate, used=used if isinstance(used, int) else None)
+                return response
+
+    def _estimate_tokens(self, messages: List[Dict[str, Any]], max_tokens: int = None) -> int:
+        """Estimate prompt + completion tokens for rate limiting (~4 characters per token)"""
+        chars = 0
+        images = 0
+        for message in messages:
+            content = message.get("content", "")
+            if isinstance(content, str):
+                chars += len(content)
+                continue
+            for part in content:
+                if part.get("type") == "text":
+                    chars += len(part.get("text", ""))
+                elif part.get("type") == "image_url":
+                    images += 1
+        return chars // 4 + images * IMAGE_TOKEN_ESTIMATE + (max_tokens or self.config.max_tokens)
+
+    def _acquire(self, priority: int, tokens: int, deadline: float):
+        """Block until this request is first in line and within concurrency and rate limits"""
+        entry = (priority, next(self._counter))
+        with self._lock:
+            heapq.heappush(self._waiting, entry)
+            try:
+                while True:
+                    wait = None
+                    if self._waiting[0] == entry and self._active < self.config.llm_max_concurrency:
+                        wait = max(
+                            self.request_bucket.wait_time(1),
+                            self.token_bucket.wait_time(tokens),
+                            self._not_before - time.monotonic(),
+                            0.0
+                        )
+                        if wait == 0:
+                            break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or (wait is not None and wait > remaining):
+                        raise LLMRequestError("LLM request deadline exceeded while waiting for capacity")
+                    self._lock.wait(timeout=min(wait, remaining) if wait is not None else remaining)
+
+                heapq.heappop(self._waiting)
+                self._active += 1
+                self.request_bucket.consume(1)
+                self.token_bucket.consume(tokens)
+            except BaseException:
+                if entry in self._waiting:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                raise
+            finally:
+                self._lock.notify_all()
+
+    def _release(self, estimate: int, used: int = None):
+        """Free a concurrency slot and reconcile estimated with actual token usage"""
+        with self._lock:
+            self._active -= 1
+            if used is not None:
+                if used < estimate:
+                    self.token_bucket.refund(estimate - used)
+                else:
+                    self.token_bucket.consume(used - estimate)
+            self._lock.notify_all()
+
+    def _pause(self, delay: float):
+        """Hold back all queued requests for `delay` seconds after the server rate-limited us"""
+        with self._lock:
+            self._not_before = max(self._not_before, time.monotonic() + delay)
+            self._lock.notify_all()
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After"""
+        delay = random.uniform(0, min(self.config.llm_max_backoff, self.config.llm_base_backoff * 2 ** attempt))
+        retry_after = self._retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    @staticmethod
+    def _retry_after(error: Exception) -> float:
+        """Parse Retry-After / retry-after-ms headers from an API error, if present"""
+        response = getattr(error, "response", None)
+        if response is None:
+            return None
+        headers = response.headers
+        try:
+            if "retry-after-ms" in headers:
+                return float(headers["retry-after-ms"]) / 1000
+            if "retry-after" in headers:
+                return float(headers["retry-after"])
+        except ValueError:
+            pass
+        return None
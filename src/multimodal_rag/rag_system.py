@@ -2,52 +2,65 @@ import openai
 import logging
 import base64
 import os
+from contextlib import contextmanager
 from typing import List, Dict, Any
 from .config import RAGConfig
 from .pdf_processor import PDFProcessor
 from .vector_store import VectorStore
+from .collection_store import CollectionStore
+from .llm_scheduler import LLMScheduler, INTERACTIVE
 
 logger = logging.getLogger(__name__)
 
 class MultimodalRAGSystem:
     """Multimodal RAG system using LLM for processing"""
     
-    def __init__(self, config: RAGConfig = None):
+    def __init__(self, config: RAGConfig = None, client: openai.OpenAI = None, scheduler: LLMScheduler = None,
+                 collections: CollectionStore = None):
+        """Pass a shared `scheduler` (and its client) and `collections` store so that
+        rate limits, open indexes and the embedding model are shared process-wide"""
         self.config = config or RAGConfig()
         self.processor = PDFProcessor(self.config)
-        self.vector_store = VectorStore(self.config)
+        self.collections = collections or CollectionStore(self.config)
+        self.vector_store = VectorStore(self.config, self.collections.embedder)
         self.image_store = {}
-        self.client = openai.OpenAI(api_key=self.config.api_key)
+        self.scheduler = scheduler or LLMScheduler(self.config, client)
+        self.client = self.scheduler.client
         
         # Load existing vector store if available
         if os.path.exists(self.config.vector_store_path):
             self.vector_store.load(self.config.vector_store_path)
     
-    def process_pdf(self, pdf_bytes: bytes, file_name: str) -> Dict[str, Any]:
-        """Process a PDF file"""
+    def process_pdf(self, pdf_bytes: bytes, file_name: str, collection: str = None) -> Dict[str, Any]:
+        """Process a PDF file into the default store or a named collection"""
         text_chunks, images = self.processor.process_pdf(pdf_bytes, file_name)
         
-        # Store text in vector store
-        self.vector_store.add_items(text_chunks)
-        
-        # Store images
-        for img in images:
-            img_id = f"{file_name}_page{img['metadata']['page']}_img{img['metadata']['image_idx']}"
-            self.image_store[img_id] = img
-            img["metadata"]["image_id"] = img_id
-        
-        # Save vector store
-        self.vector_store.save(self.config.vector_store_path)
+        with self._open_stores(collection, write=True) as (vector_store, image_store):
+            # Store text in vector store
+            vector_store.add_items(text_chunks)
+            
+            # Store images
+            for img in images:
+                img_id = f"{file_name}_page{img['metadata']['page']}_img{img['metadata']['image_idx']}"
+                image_store[img_id] = img
+                img["metadata"]["image_id"] = img_id
+            
+            # Save vector store (named collections are saved by open_for_write)
+            if collection is None:
+                self.vector_store.save(self.config.vector_store_path)
         
         return {
             "text_chunks": len(text_chunks),
             "images": len(images)
         }
     
-    def query(self, query: str, max_images: int = 2) -> Dict[str, Any]:
-        """Query the system with multimodal support"""
-        # Retrieve relevant text
-        text_results = self.vector_store.retrieve_text(query, k=3)
+    def query(self, query: str, max_images: int = 2, collection: str = None) -> Dict[str, Any]:
+        """Query the system with multimodal support, optionally within a named collection"""
+        # Retrieve relevant text; the collection is locked only for the search,
+        # not for the LLM calls below
+        with self._open_stores(collection) as (vector_store, image_store):
+            text_results = vector_store.retrieve_text(query, k=3)
+            image_store = dict(image_store)
         context_text = "\n\n".join([item["content"] for item in text_results])
         
         # Prepare image context
@@ -60,8 +73,8 @@ class MultimodalRAGSystem:
                 start = result["content"].find("[Image:") + 7
                 end = result["content"].find("]", start)
                 img_id = result["content"][start:end].strip()
-                if img_id in self.image_store:
-                    img = self.image_store[img_id]
+                if img_id in image_store:
+                    img = image_store[img_id]
                     image_context.append(
                         f"Image from {img['metadata']['file']} page {img['metadata']['page']}: " + 
                         self._describe_image(img['content'])
@@ -76,7 +89,7 @@ class MultimodalRAGSystem:
         # Add up to max_images additional images
         remaining = max_images - len(image_urls)
         if remaining > 0:
-            for img_id, img in list(self.image_store.items())[:remaining]:
+            for img_id, img in list(image_store.items())[:remaining]:
                 if img_id not in [i['metadata']['image_id'] for i in image_urls]:
                     image_context.append(
                         f"Image from {img['metadata']['file']} page {img['metadata']['page']}: " + 
@@ -133,7 +146,8 @@ class MultimodalRAGSystem:
         })
         
         # Generate response
-        response = self.client.chat.completions.create(
+        response = self.scheduler.create(
+            priority=INTERACTIVE,
             model=self.config.model,
             messages=messages,
             max_tokens=self.config.max_tokens,
@@ -146,9 +160,10 @@ class MultimodalRAGSystem:
             "image_context": [img["image_url"]["url"] for img in image_urls]
         }
     
-    def _describe_image(self, base64_image: str) -> str:
+    def _describe_image(self, base64_image: str, priority: int = INTERACTIVE) -> str:
         """Get text description of an image"""
-        response = self.client.chat.completions.create(
+        response = self.scheduler.create(
+            priority=priority,
             model=self.config.model,
             messages=[
                 {
@@ -168,9 +183,26 @@ class MultimodalRAGSystem:
         )
         return response.choices[0].message.content
     
-    def clear_data(self):
-        """Clear all stored data"""
-        self.vector_store = VectorStore(self.config)
+    @contextmanager
+    def _open_stores(self, collection: str = None, write: bool = False):
+        """Yield the (vector store, image store) pair for a collection, or the default store.
+
+        Named collections are locked for the duration of the block (and saved
+        afterwards when writing), so searches never run during an index update.
+        """
+        if collection is None:
+            yield self.vector_store, self.image_store
+            return
+        opener = self.collections.open_for_write if write else self.collections.open_for_read
+        with opener(collection) as coll:
+            yield coll.vector_store, coll.image_store
+    
+    def clear_data(self, collection: str = None):
+        """Clear all stored data, or only the data of a named collection"""
+        if collection is not None:
+            self.collections.delete(collection)
+            return
+        self.vector_store = VectorStore(self.config, self.vector_store.embedder)
         self.image_store = {}
         if os.path.exists(self.config.vector_store_path):
             os.remove(self.config.vector_store_path)
\ No newline at end of file
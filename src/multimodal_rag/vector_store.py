@@ -2,17 +2,17 @@ import numpy as np
 import faiss
 import pickle
 import logging
-from sentence_transformers import SentenceTransformer
 from typing import List, Dict, Any
+from .embedders import Embedder, create_embedder
 
 logger = logging.getLogger(__name__)
 
 class VectorStore:
     """Handles vector storage and retrieval"""
     
-    def __init__(self, config):
+    def __init__(self, config, embedder: Embedder = None):
         self.config = config
-        self.embedder = SentenceTransformer('all-MiniLM-L6-v2')
+        self.embedder = embedder or create_embedder(config)
         self.index = None
         self.items = []
     
@@ -28,7 +28,7 @@ class VectorStore:
         contents = [item["content"] for item in text_items]
         
         # Generate embeddings
-        embeddings = self.embedder.encode(contents, normalize_embeddings=True)
+        embeddings = self.embedder.encode(contents)
         
         # Initialize index if needed
         if self.index is None:
@@ -45,7 +45,7 @@ class VectorStore:
             return []
         
         # Embed query
-        query_embedding = self.embedder.encode([query], normalize_embeddings=True)
+        query_embedding = self.embedder.encode([query])
         
         # Search index
         distances, indices = self.index.search(query_embedding, k)
@@ -62,14 +62,16 @@ class VectorStore:
             }, f)
         logger.info(f"Vector store saved to {filepath}")
     
-    def load(self, filepath: str):
-        """Load vector store from disk"""
+    def load(self, filepath: str, strict: bool = False):
+        """Load vector store from disk (re-raise errors if strict)"""
         try:
             with open(filepath, 'rb') as f:
                 data = pickle.load(f)
+            index = faiss.deserialize_index(data["index"]) if data["index"] is not None else None
             self.items = data["items"]
-            if data["index"]:
-                self.index = faiss.deserialize_index(data["index"])
+            self.index = index
             logger.info(f"Vector store loaded from {filepath}")
         except Exception as e:
-            logger.error(f"Error loading vector store: {e}")
\ No newline at end of file
+            logger.error(f"Error loading vector store: {e}")
+            if strict:
+                raise
\ No newline at end of file
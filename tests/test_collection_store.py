@@ -0,0 +1,197 @@
+import os
+import time
+import threading
+import pytest
+from src.multimodal_rag.collection_store import CollectionStore, CollectionBusyError
+import numpy as np
+from src.multimodal_rag.embedders import HashingEmbedder
+from src.multimodal_rag.config import RAGConfig
+
+@pytest.fixture
+def store(tmp_path):
+    config = RAGConfig(collections_root=str(tmp_path / "collections"), collection_memory_budget_mb=1)
+    return CollectionStore(config, embedder=HashingEmbedder(dimension=32))
+
+class RandomEmbedder(HashingEmbedder):
+    """Fast embedder so concurrency tests spend their time inside faiss"""
+
+    def _encode_batch(self, texts):
+        return np.random.rand(len(texts), self.dimension).astype(np.float32)
+
+def reopen(store):
+    """A fresh store over the same directory, as after a process restart"""
+    return CollectionStore(store.config, embedder=store.embedder)
+
+def add_text(store, name, texts):
+    with store.open_for_write(name) as collection:
+        collection.vector_store.add_items([{"type": "text", "content": t, "metadata": {}} for t in texts])
+    return collection
+
+def test_collections_share_embedder(store):
+    team_a = store.get("team-a")
+    team_b = store.get("team-b")
+
+    assert team_a is not team_b
+    assert team_a.vector_store.embedder is team_b.vector_store.embedder is store.embedder
+
+def test_queries_routed_by_collection(store):
+    add_text(store, "finance", ["quarterly revenue report"])
+    add_text(store, "legal", ["contract termination clause"])
+
+    assert store.get("finance").vector_store.retrieve_text("revenue", k=1)[0]["content"] == "quarterly revenue report"
+    assert store.get("legal").vector_store.retrieve_text("contract", k=1)[0]["content"] == "contract termination clause"
+
+def test_save_and_reopen(store):
+    with store.open_for_write("docs") as collection:
+        collection.vector_store.add_items([{"type": "text", "content": "persisted chunk", "metadata": {}}])
+        collection.image_store["img1"] = {"content": "base64_img", "metadata": {}}
+    assert not collection.dirty
+    # Only the final files remain; temp files are replaced into place
+    assert sorted(os.listdir(collection.path)) == ["images.pkl", "vector_store.pkl"]
+
+    store.delete("other")  # no-op for missing collections
+    store = reopen(store)
+
+    reopened = store.get("docs")
+    assert reopened is not collection
+    assert reopened.vector_store.items[0]["content"] == "persisted chunk"
+    assert "img1" in reopened.image_store
+    assert store.list_collections() == ["docs"]
+
+def test_lru_eviction_saves_to_disk(store):
+    # Each collection holds ~600KB of text, so only one fits in the 1MB budget
+    big_text = "x" * 600 * 1024
+    add_text(store, "first", [big_text])
+    add_text(store, "second", [big_text])
+
+    assert list(store._open) == ["second"]
+    assert store.stats()["memory_bytes"] <= store.memory_budget
+
+    # Evicted collection was written to disk and is reopened lazily
+    reopened = store.get("first")
+    assert reopened.vector_store.items[0]["content"] == big_text
+    assert list(store._open) == ["first"]
+
+def test_get_refreshes_lru_order(store):
+    store.get("a")
+    store.get("b")
+    store.get("a")
+
+    assert list(store._open) == ["b", "a"]
+
+def test_delete(store):
+    add_text(store, "temp", ["to be removed"])
+    store.delete("temp")
+
+    assert store.list_collections() == []
+    assert store.get("temp").vector_store.items == []
+
+def test_pinned_collection_not_evicted(store):
+    big_text = "x" * 600 * 1024
+    with store.open_for_write("writing") as collection:
+        collection.vector_store.add_items([{"type": "text", "content": big_text, "metadata": {}}])
+        add_text(store, "other", [big_text])
+        assert "writing" in store._open
+
+    # Once released, the least recently used collection is evicted
+    assert list(store._open) == ["other"]
+
+def test_corrupt_collection_not_overwritten(store):
+    collection = add_text(store, "docs", ["precious chunk"])
+    with open(os.path.join(collection.path, "vector_store.pkl"), "wb") as f:
+        f.write(b"truncated")
+    store = reopen(store)
+
+    with pytest.raises(Exception):
+        store.get("docs")
+    assert "docs" not in store._open
+
+def test_failed_write_leaves_previous_files(store, monkeypatch):
+    collection = add_text(store, "docs", ["first version"])
+
+    def broken_save(filepath):
+        with open(filepath, "wb") as f:
+            f.write(b"partial")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(collection.vector_store, "save", broken_save)
+    with pytest.raises(OSError):
+        with store.open_for_write("docs") as coll:
+            coll.vector_store.items.append({"type": "text", "content": "second version", "metadata": {}})
+
+    assert sorted(os.listdir(collection.path)) == ["images.pkl", "vector_store.pkl"]
+    # The partially modified in-memory copy is discarded and reloaded from disk
+    assert "docs" not in store._open
+    assert store.get("docs").vector_store.items[0]["content"] == "first version"
+
+def test_delete_refused_while_writing(store):
+    with store.open_for_write("busy") as collection:
+        collection.vector_store.add_items([{"type": "text", "content": "in progress", "metadata": {}}])
+        with pytest.raises(CollectionBusyError):
+            store.delete("busy")
+
+    assert store.get("busy").vector_store.items[0]["content"] == "in progress"
+
+def test_deleted_collection_not_written_back(store):
+    stale = add_text(store, "temp", ["old data"])
+    store.delete("temp")
+
+    assert stale.deleted
+    with pytest.raises(RuntimeError):
+        stale.save()
+    assert store.list_collections() == []
+
+def test_memory_accounting(store):
+    add_text(store, "a", ["x" * 1000])
+    add_text(store, "b", ["y" * 2000, "z" * 10])
+    store.get("c")
+    add_text(store, "a", ["more"])
+
+    stats = store.stats()
+    expected = {name: c.memory_bytes() for name, c in store._open.items()}
+    assert stats["per_collection"] == expected
+    assert stats["memory_bytes"] == sum(expected.values())
+
+    store.delete("b")
+    assert store.stats()["memory_bytes"] == sum(c.memory_bytes() for c in store._open.values())
+
+def test_concurrent_read_and_write(tmp_path):
+    config = RAGConfig(collections_root=str(tmp_path), collection_memory_budget_mb=1024)
+    store = CollectionStore(config, embedder=RandomEmbedder(dimension=128, batch_size=5000, max_batch_tokens=10 ** 6))
+    errors = []
+    done = threading.Event()
+
+    def write():
+        try:
+            for batch in range(20):
+                add_text(store, "shared", [f"chunk {batch} {i}" for i in range(5000)])
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    def read():
+        try:
+            while not done.is_set():
+                with store.open_for_read("shared") as collection:
+                    items = collection.vector_store.items
+                    index = collection.vector_store.index
+                    # Under the lock, the index and items never disagree
+                    assert index is None or index.ntotal == len(items)
+                    collection.vector_store.retrieve_text("chunk", k=3)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=60)
+
+    assert not errors
+    assert len(store.get("shared").vector_store.items) == 20 * 5000
+
+@pytest.mark.parametrize("name", ["../escape", "", ".hidden", "a/b"])
+def test_invalid_collection_name(store, name):
+    with pytest.raises(ValueError):
+        store.get(name)
@@ -0,0 +1,150 @@
+import pytest
+import numpy as np
+from src.multimodal_rag.embedders import HashingEmbedder, create_embedder, benchmark_embedder
+from src.multimodal_rag.vector_store import VectorStore
+from src.multimodal_rag.config import RAGConfig
+
+@pytest.fixture
+def embedder():
+    return HashingEmbedder(dimension=64, batch_size=2, max_batch_tokens=100)
+
+def test_hashing_embedder_deterministic(embedder):
+    first = embedder.encode(["machine learning", "vector search"])
+    second = embedder.encode(["machine learning", "vector search"])
+
+    assert first.shape == (2, 64)
+    assert first.dtype == np.float32
+    assert np.allclose(first, second)
+    assert np.allclose(np.linalg.norm(first, axis=1), 1.0)
+
+def test_encode_preserves_order(embedder):
+    texts = ["a " * 200, "short", "medium length text here", "x"]
+    batched = embedder.encode(texts)
+    single = np.vstack([embedder.encode([t]) for t in texts])
+
+    assert np.allclose(batched, single)
+
+def test_make_batches_length_sorted(embedder):
+    texts = ["a" * 400, "b", "c" * 40, "d" * 8]
+    batches = embedder._make_batches(texts)
+
+    # Every index appears exactly once
+    assert sorted(i for batch in batches for i in batch) == [0, 1, 2, 3]
+    # Batches respect the size cap and shortest texts come first
+    assert all(len(batch) <= 2 for batch in batches)
+    assert batches[0] == [1, 3]
+    # Long text exceeding the token budget gets its own batch
+    assert [0] in batches
+
+def test_encode_empty(embedder):
+    assert embedder.encode([]).shape == (0, 64)
+
+def test_create_embedder():
+    config = RAGConfig(embedding_backend="hashing", embedding_batch_size=8)
+    embedder = create_embedder(config)
+    assert isinstance(embedder, HashingEmbedder)
+    assert embedder.batch_size == 8
+
+    with pytest.raises(ValueError):
+        create_embedder(RAGConfig(embedding_backend="unknown"))
+    with pytest.raises(ValueError):
+        create_embedder(RAGConfig(embedding_backend="onnx"))
+
+def test_vector_store_with_hashing_embedder(embedder):
+    store = VectorStore(RAGConfig(), embedder=embedder)
+    store.add_items([
+        {"type": "text", "content": "neural networks learn", "metadata": {}},
+        {"type": "text", "content": "pdf image extraction", "metadata": {}},
+    ])
+
+    results = store.retrieve_text("pdf image", k=1)
+    assert results[0]["content"] == "pdf image extraction"
+
+def test_benchmark_embedder(embedder):
+    result = benchmark_embedder(embedder, ["some text"] * 10, repeats=1)
+    assert result["backend"] == "HashingEmbedder"
+    assert result["chunks"] == 10
+    assert result["chunks_per_sec"] > 0
+
+VOCAB = {"[PAD]": 0, "[UNK]": 1, "hello": 2, "world": 3, "dimension": 4, "probe": 5}
+
+def make_onnx_model(path, pooled_output: bool, filename: str = "model_quantized.onnx", attention_mask: bool = True):
+    """Write a tiny embedding-lookup ONNX graph plus a word-level tokenizer.json to `path`"""
+    onnx = pytest.importorskip("onnx")
+    from onnx import helper, numpy_helper, TensorProto
+    from tokenizers import Tokenizer, models, pre_tokenizers
+
+    table = np.arange(len(VOCAB) * 4, dtype=np.float32).reshape(len(VOCAB), 4)
+    nodes = [helper.make_node("Gather", ["table", "input_ids"], ["last_hidden_state"])]
+    outputs = [helper.make_tensor_value_info("last_hidden_state", TensorProto.FLOAT, ["batch", "seq", 4])]
+    if pooled_output:
+        nodes.append(helper.make_node("ReduceMax", ["last_hidden_state"], ["sentence_embedding"], axes=[1], keepdims=0))
+        outputs.insert(0, helper.make_tensor_value_info("sentence_embedding", TensorProto.FLOAT, ["batch", 4]))
+
+    inputs = [helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["batch", "seq"])]
+    if attention_mask:
+        inputs.append(helper.make_tensor_value_info("attention_mask", TensorProto.INT64, ["batch", "seq"]))
+
+    graph = helper.make_graph(
+        nodes, "tiny_embedder",
+        inputs,
+        outputs,
+        initializer=[numpy_helper.from_array(table, "table")]
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, str(path / filename))
+
+    tokenizer = Tokenizer(models.WordLevel(VOCAB, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.save(str(path / "tokenizer.json"))
+    return table
+
+def normalized(vector):
+    return vector / np.linalg.norm(vector)
+
+def test_onnx_embedder_mean_pooling(tmp_path):
+    pytest.importorskip("onnxruntime")
+    from src.multimodal_rag.embedders import ONNXEmbedder
+    table = make_onnx_model(tmp_path, pooled_output=False)
+
+    embedder = ONNXEmbedder(str(tmp_path), num_threads=1)
+    result = embedder.encode(["hello world", "hello"])
+
+    assert embedder.dimension == 4
+    # Padding in the shorter text must not affect its mean
+    assert np.allclose(result[0], normalized(table[[2, 3]].mean(axis=0)))
+    assert np.allclose(result[1], normalized(table[2]))
+
+def test_onnx_embedder_pooled_output(tmp_path):
+    pytest.importorskip("onnxruntime")
+    from src.multimodal_rag.embedders import ONNXEmbedder
+    table = make_onnx_model(tmp_path, pooled_output=True)
+
+    embedder = ONNXEmbedder(str(tmp_path))
+    result = embedder.encode(["hello world"])
+
+    assert embedder.output_name == "sentence_embedding"
+    assert np.allclose(result[0], normalized(table[[2, 3]].max(axis=0)))
+
+def test_onnx_embedder_requires_quantized_model(tmp_path, caplog):
+    pytest.importorskip("onnxruntime")
+    from src.multimodal_rag.embedders import ONNXEmbedder
+    make_onnx_model(tmp_path, pooled_output=False, filename="model.onnx")
+
+    with pytest.raises(FileNotFoundError):
+        ONNXEmbedder(str(tmp_path))
+
+    embedder = ONNXEmbedder(str(tmp_path), allow_fp32=True)
+    assert embedder.dimension == 4
+    assert "falling back to fp32" in caplog.text
+
+def test_onnx_embedder_without_attention_mask_input(tmp_path):
+    pytest.importorskip("onnxruntime")
+    from src.multimodal_rag.embedders import ONNXEmbedder
+    table = make_onnx_model(tmp_path, pooled_output=False, attention_mask=False)
+
+    embedder = ONNXEmbedder(str(tmp_path))
+    result = embedder.encode(["hello world"])
+
+    assert np.allclose(result[0], normalized(table[[2, 3]].mean(axis=0)))
@@ -0,0 +1,194 @@
+import json
+import time
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.multimodal_rag.llm_scheduler import (
+    LLMScheduler, LLMRequestError, TokenBucket, create_client, INTERACTIVE, BACKGROUND
+)
+from src.multimodal_rag.config import RAGConfig
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Fake chat completions endpoint replaying a scripted list of (status, headers) responses"""
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.requests.append(body)
+            server.times.append(time.monotonic())
+            status, headers = server.script.pop(0) if server.script else (200, {})
+
+        if status == 200:
+            payload = {
+                "id": "chatcmpl-test",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": body["messages"][-1]["content"]},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": 5, "completion_tokens": 5, "total_tokens": 10}
+            }
+        else:
+            payload = {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit"}}
+
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def fake_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAIHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.times = []
+    server.script = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def make_scheduler(server, **overrides):
+    options = dict(
+        api_key="test_key",
+        llm_base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+        llm_base_backoff=0.01,
+        llm_max_backoff=0.05,
+        llm_timeout=5.0,
+    )
+    options.update(overrides)
+    return LLMScheduler(RAGConfig(**options))
+
+def ask(scheduler, text, **kwargs):
+    return scheduler.create(model="gpt-4o", messages=[{"role": "user", "content": text}], max_tokens=10, **kwargs)
+
+def test_token_bucket():
+    now = [0.0]
+    bucket = TokenBucket(60, period=60.0, clock=lambda: now[0])
+
+    assert bucket.wait_time(60) == 0
+    bucket.consume(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+
+    now[0] = 30.0
+    assert bucket.wait_time(30) == 0
+    bucket.refund(100)
+    assert bucket.tokens == 60
+
+def test_create_success(fake_server):
+    scheduler = make_scheduler(fake_server)
+    response = ask(scheduler, "hello")
+
+    assert response.choices[0].message.content == "hello"
+    assert len(fake_server.requests) == 1
+    assert scheduler._active == 0
+
+def test_retry_after_429(fake_server):
+    fake_server.script = [(429, {"Retry-After": "0.2"}), (429, {"retry-after-ms": "50"})]
+    scheduler = make_scheduler(fake_server)
+
+    start = time.monotonic()
+    response = ask(scheduler, "retry me")
+
+    assert response.choices[0].message.content == "retry me"
+    assert len(fake_server.requests) == 3
+    assert time.monotonic() - start >= 0.25
+
+def test_retries_exhausted(fake_server):
+    fake_server.script = [(503, {})] * 5
+    scheduler = make_scheduler(fake_server, llm_max_retries=2)
+
+    with pytest.raises(LLMRequestError):
+        ask(scheduler, "fail")
+    assert len(fake_server.requests) == 3
+    assert scheduler._active == 0
+
+def test_deadline_respects_retry_after(fake_server):
+    fake_server.script = [(429, {"Retry-After": "30"})]
+    scheduler = make_scheduler(fake_server)
+
+    start = time.monotonic()
+    with pytest.raises(LLMRequestError, match="deadline"):
+        ask(scheduler, "slow", timeout=1.0)
+    assert time.monotonic() - start < 1.0
+
+def test_rate_limit_deadline(fake_server):
+    scheduler = make_scheduler(fake_server, llm_requests_per_minute=1)
+    ask(scheduler, "first")
+
+    with pytest.raises(LLMRequestError, match="capacity"):
+        ask(scheduler, "second", timeout=0.5)
+    assert len(fake_server.requests) == 1
+
+def test_interactive_before_background(fake_server):
+    scheduler = make_scheduler(fake_server, llm_max_concurrency=1)
+    order = []
+
+    # Hold the only slot so both requests queue up
+    scheduler._acquire(INTERACTIVE, 0, time.monotonic() + 5)
+
+    def run(text, priority):
+        ask(scheduler, text, priority=priority)
+        order.append(text)
+
+    background = threading.Thread(target=run, args=("background", BACKGROUND))
+    background.start()
+    time.sleep(0.1)
+    interactive = threading.Thread(target=run, args=("interactive", INTERACTIVE))
+    interactive.start()
+    time.sleep(0.1)
+
+    scheduler._release(0)
+    background.join(timeout=5)
+    interactive.join(timeout=5)
+
+    assert order == ["interactive", "background"]
+
+def test_retry_after_pauses_all_requests(fake_server):
+    fake_server.script = [(429, {"Retry-After": "0.5"})]
+    scheduler = make_scheduler(fake_server)
+
+    first = threading.Thread(target=ask, args=(scheduler, "first"))
+    first.start()
+    while not fake_server.times:
+        time.sleep(0.01)
+    time.sleep(0.1)
+
+    # A request arriving during the cooldown must wait instead of hitting the limit again
+    second = threading.Thread(target=ask, args=(scheduler, "second"))
+    second.start()
+    first.join(timeout=5)
+    second.join(timeout=5)
+
+    assert len(fake_server.requests) == 3
+    assert all(t - fake_server.times[0] >= 0.45 for t in fake_server.times[1:])
+
+def test_close(fake_server):
+    scheduler = make_scheduler(fake_server)
+    ask(scheduler, "hello")
+    scheduler.close()
+
+    assert scheduler.client.is_closed()
+
+def test_caller_client_not_closed(fake_server):
+    config = make_scheduler(fake_server).config
+    client = create_client(config)
+    scheduler = LLMScheduler(config, client)
+    ask(scheduler, "hello")
+    scheduler.close()
+
+    assert not scheduler.owns_client
+    assert not client.is_closed()
+    client.close()
@@ -2,6 +2,9 @@ import pytest
 from unittest.mock import patch, MagicMock, ANY
 from src.multimodal_rag.rag_system import MultimodalRAGSystem
 from src.multimodal_rag.config import RAGConfig
+from src.multimodal_rag.collection_store import CollectionStore
+from src.multimodal_rag.embedders import HashingEmbedder
+from src.multimodal_rag.llm_scheduler import create_client
 
 @pytest.fixture
 def rag_system():
@@ -99,4 +102,83 @@ def test_describe_image(rag_system):
         mock_create.assert_called_once()
         call_args = mock_create.call_args[1]
         assert call_args["model"] == "gpt-4-turbo"
-        assert "Describe this image in detail" in call_args["messages"][0]["content"][0]["text"]
\ No newline at end of file
+        assert "Describe this image in detail" in call_args["messages"][0]["content"][0]["text"]
+
+
+def test_shared_collection_store(tmp_path):
+    config = RAGConfig(api_key="test_key", collections_root=str(tmp_path), vector_store_path=str(tmp_path / "default.pkl"))
+    collections = CollectionStore(config, embedder=HashingEmbedder(dimension=32))
+    first = MultimodalRAGSystem(config, collections=collections)
+    second = MultimodalRAGSystem(config, collections=collections)
+
+    for system, text in [(first, "alpha report"), (second, "beta report")]:
+        with patch.object(system.processor, 'process_pdf') as mock_process:
+            mock_process.return_value = ([{"type": "text", "content": text, "metadata": {}}], [])
+            system.process_pdf(b"dummy", f"{text}.pdf", collection="team")
+
+    # Both writes land in the same collection, in memory and on disk
+    assert first.vector_store.embedder is second.vector_store.embedder
+    contents = [item["content"] for item in collections.get("team").vector_store.items]
+    assert contents == ["alpha report", "beta report"]
+
+    reopened = CollectionStore(config, embedder=HashingEmbedder(dimension=32))
+    assert len(reopened.get("team").vector_store.items) == 2
+
+
+def test_caller_client_stays_open(tmp_path):
+    import gc
+
+    config = RAGConfig(api_key="test_key", collections_root=str(tmp_path), vector_store_path=str(tmp_path / "default.pkl"))
+    client = create_client(config)
+    system = MultimodalRAGSystem(
+        config, client=client, collections=CollectionStore(config, embedder=HashingEmbedder(dimension=32))
+    )
+    assert system.client is client
+
+    # Dropping the system (and its private scheduler) must not close a client it does not own
+    del system
+    gc.collect()
+    assert not client.is_closed()
+    client.close()
+
+
+def test_concurrent_query_and_write(tmp_path):
+    import threading
+
+    config = RAGConfig(api_key="test_key", collections_root=str(tmp_path), vector_store_path=str(tmp_path / "default.pkl"))
+    collections = CollectionStore(config, embedder=HashingEmbedder(dimension=32))
+    writer = MultimodalRAGSystem(config, collections=collections)
+    reader = MultimodalRAGSystem(config, collections=collections)
+
+    answer = MagicMock()
+    answer.choices = [MagicMock(message=MagicMock(content="Answer"))]
+    errors = []
+    done = threading.Event()
+
+    def write():
+        try:
+            for batch in range(20):
+                chunks = [{"type": "text", "content": f"report {batch} part {i}", "metadata": {}} for i in range(50)]
+                with patch.object(writer.processor, 'process_pdf', return_value=(chunks, [])):
+                    writer.process_pdf(b"dummy", f"report{batch}.pdf", collection="team")
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    def read():
+        try:
+            with patch.object(reader.scheduler, 'create', return_value=answer):
+                while not done.is_set():
+                    assert reader.query("report", collection="team")["answer"] == "Answer"
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write), threading.Thread(target=read)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=60)
+
+    assert not errors
+    assert len(collections.get("team").vector_store.items) == 20 * 50